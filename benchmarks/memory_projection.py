@@ -0,0 +1,107 @@
+"""Retained memory of raw JotForm submissions vs. CompactSubmission.
+
+Builds synthetic submissions shaped like the JotForm API response (answer
+objects with text/order/sublabels/etc., plus non-input questions) and
+measures with tracemalloc what stays alive after parsing each page.
+
+    python benchmarks/memory_projection.py [submissions]
+"""
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync  # noqa: E402
+
+TEXT_QUESTIONS = 24
+NON_INPUT_QUESTIONS = 8
+
+
+def build_questions():
+    questions = {}
+    qid = 1
+    for i in range(TEXT_QUESTIONS):
+        questions[str(qid)] = {"name": f"text{i}", "type": "control_textbox", "text": f"Text {i}"}
+        qid += 1
+    questions[str(qid)] = {"name": "name", "type": "control_fullname", "text": "Name"}
+    questions[str(qid + 1)] = {"name": "homeAddress", "type": "control_address", "text": "Home Address"}
+    questions[str(qid + 2)] = {"name": "interests", "type": "control_checkbox", "text": "Fields of Interest"}
+    questions[str(qid + 3)] = {"name": "resume", "type": "control_fileupload", "text": "Resume"}
+    qid += 4
+    for i in range(NON_INPUT_QUESTIONS):
+        questions[str(qid)] = {"name": f"head{i}", "type": "control_head", "text": f"Section {i}"}
+        qid += 1
+    return questions
+
+
+def raw_submission(n, questions):
+    answers = {}
+    for qid, q in questions.items():
+        obj = {
+            "name": q["name"],
+            "order": qid,
+            "text": f"{q['text']} - please answer this question as fully as you can",
+            "type": q["type"],
+        }
+        if q["type"] == "control_textbox":
+            obj["answer"] = f"answer {n} for {q['name']}"
+        elif q["type"] == "control_fullname":
+            obj["answer"] = {"first": f"First{n}", "last": f"Last{n}"}
+            obj["prettyFormat"] = f"First{n} Last{n}"
+            obj["sublabels"] = '{"prefix":"Prefix","first":"First Name","middle":"Middle Name","last":"Last Name","suffix":"Suffix"}'
+        elif q["type"] == "control_address":
+            obj["answer"] = {"addr_line1": f"{n} Main St", "addr_line2": "", "city": "Cleveland", "state": "OH", "postal": "44101"}
+            obj["prettyFormat"] = f"Street Address: {n} Main St<br>City: Cleveland<br>State: OH<br>Zip: 44101"
+            obj["sublabels"] = '{"cc_firstName":"First Name","addr_line1":"Street Address","addr_line2":"Street Address Line 2","city":"City","state":"State / Province","postal":"Postal / Zip Code"}'
+        elif q["type"] == "control_checkbox":
+            obj["answer"] = ["Engineering", "Mentoring", "Equity"]
+            obj["prettyFormat"] = "Engineering; Mentoring; Equity"
+        elif q["type"] == "control_fileupload":
+            obj["answer"] = [f"https://www.jotform.com/uploads/acct/form/{n}/resume_{n}.pdf"]
+        answers[qid] = obj
+    return json.dumps({
+        "id": str(6000000000000000000 + n),
+        "form_id": "231234567890123",
+        "ip": "203.0.113.7",
+        "created_at": "2026-01-01 10:00:00",
+        "status": "ACTIVE",
+        "new": "1",
+        "flag": "0",
+        "notes": "",
+        "updated_at": None,
+        "answers": answers,
+    })
+
+
+def retained(pages, keep):
+    tracemalloc.start()
+    kept = []
+    for page in pages:
+        kept.extend(keep(s) for s in json.loads(page))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    questions = build_questions()
+    sync.QUESTIONS_CACHE = questions
+    qids = sync.mapped_question_ids()
+    pages = [
+        "[" + ",".join(raw_submission(n, questions) for n in range(start, min(start + 100, count))) + "]"
+        for start in range(0, count, 100)
+    ]
+
+    raw = retained(pages, lambda s: s)
+    compact = retained(pages, lambda s: sync.project_submission(s, qids))
+    print(f"submissions: {count}")
+    print(f"raw dicts:   {raw / 1024 / 1024:8.1f} MiB")
+    print(f"compact:     {compact / 1024 / 1024:8.1f} MiB")
+    print(f"reduction:   {raw / compact:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
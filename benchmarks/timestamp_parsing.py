@@ -0,0 +1,97 @@
+"""Timestamp and date parsing: the old strptime code vs. timestamps.py.
+
+Parses synthetic JotForm "YYYY-MM-DD HH:MM:SS" values the way a sync
+does. Every submission carries created_at/updated_at, so most timestamps
+are distinct. Date answers repeat often. Each case is timed with the new
+parsers' caches cleared, then again with the caches warm.
+
+    python benchmarks/timestamp_parsing.py [submissions]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timestamps  # noqa: E402
+
+
+def old_parse_timestamp(value):
+    """parse_timestamp as it was before timestamps.py."""
+    if not value:
+        return 0
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+            return int(dt.timestamp())
+        except ValueError:
+            try:
+                return int(value)
+            except ValueError:
+                return 0
+    return 0
+
+
+def old_parse_date(value):
+    """The date branch of the old build_airtable_fields."""
+    try:
+        dt = datetime.strptime(value.split()[0], "%Y-%m-%d")
+        return dt.strftime("%Y-%m-%d")
+    except (ValueError, IndexError):
+        return None
+
+
+def build_inputs(count):
+    rng = random.Random(0)
+    start = datetime(2023, 1, 1).timestamp()
+    stamps = []
+    for _ in range(count):
+        created = start + rng.randrange(0, 3 * 365 * 86400)
+        for ts in (created, created + rng.randrange(0, 30 * 86400)):
+            stamps.append(datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"))
+    # A few date questions per submission, drawn from a small set of days
+    days = [datetime.fromtimestamp(start + d * 86400).strftime("%Y-%m-%d") for d in range(60)]
+    dates = [f"{rng.choice(days)} 00:00:00" for _ in range(count * 3)]
+    return stamps, dates
+
+
+def timed(fn, values):
+    began = time.perf_counter()
+    for value in values:
+        fn(value)
+    return time.perf_counter() - began
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    stamps, dates = build_inputs(count)
+    timestamps.set_timezone("UTC")
+
+    # The old code used the machine's local time and the new code uses an
+    # explicit zone, so the results are only compared when the process runs in UTC.
+    if time.timezone == 0 and not time.daylight:
+        assert [old_parse_timestamp(s) for s in stamps] == [timestamps.parse_timestamp(s) for s in stamps]
+    assert [old_parse_date(d) for d in dates] == [timestamps.parse_date(d) for d in dates]
+
+    rows = []
+    for label, values, old, new, cache in (
+        ("timestamps", stamps, old_parse_timestamp, timestamps.parse_timestamp, timestamps.parse_datetime_string),
+        ("dates", dates, old_parse_date, timestamps.parse_date, timestamps.parse_date),
+    ):
+        cache.cache_clear()
+        before = timed(old, values)
+        cold = timed(new, values)
+        warm = timed(new, values)
+        rows.append((label, len(values), before, cold, warm))
+
+    print(f"{'values':<12}{'count':>8}{'strptime':>12}{'new':>10}{'cached':>10}")
+    for label, n, before, cold, warm in rows:
+        print(f"{label:<12}{n:>8}{before:>11.3f}s{cold:>9.3f}s{warm:>9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
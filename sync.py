@@ -1,12 +1,32 @@
 import os
 import json
 import time
+import dbm
+import sqlite3
+import hashlib
 import argparse
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from abc import ABC, abstractmethod
+import logging
+import logging.handlers
+import socket
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 import requests
 from dotenv import load_dotenv
 
+import timestamps
+from timestamps import format_timestamp, parse_date, parse_timestamp
+
+try:
+    import fcntl
+except ImportError:  # Windows: lease files are written without a guard lock
+    fcntl = None
+
 load_dotenv()
 
 JOTFORM_API_KEY = os.getenv("JOTFORM_API_KEY", "")
@@ -84,13 +104,61 @@ COMPOSITE_FIELDS = {
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 WATERMARK_FILE = os.path.join(SCRIPT_DIR, "watermark.json")
+PLAN_FILE = os.path.join(SCRIPT_DIR, "plan.jsonl")
+SNAPSHOT_FILE = os.path.join(SCRIPT_DIR, "snapshot.json")
+CHANGELOG_TARGET = os.getenv("CHANGELOG", "")
+CHANGELOG_MAX_BYTES = int(os.getenv("CHANGELOG_MAX_BYTES", str(10 * 1024 * 1024)))
+CHANGELOG_BACKUPS = int(os.getenv("CHANGELOG_BACKUPS", "5"))
+CHANGELOG_LOGGER: Optional[logging.Logger] = None
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "file")
+STATE_DEFAULT_PATHS = {
+    "file": "state.json",
+    "sqlite": "state.sqlite",
+    "dbm": "state.dbm",
+}
+STATE_PATH = os.getenv("STATE_PATH") or os.path.join(
+    SCRIPT_DIR, ".state", STATE_DEFAULT_PATHS.get(STATE_BACKEND, "state")
+)
+
+LEASE_BACKEND = os.getenv("LEASE_BACKEND", "file")
+LEASE_DIR = os.getenv("LEASE_DIR", os.path.join(SCRIPT_DIR, ".leases"))
+LEASE_TTL = float(os.getenv("LEASE_TTL", "900"))
+LEASE_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+SYNC_SHARDS = max(int(os.getenv("SYNC_SHARDS", "1")), 1)
+SYNC_WORKERS = max(int(os.getenv("SYNC_WORKERS", "1")), 1)
+
+LIVE_LANE_SHARE = float(os.getenv("LIVE_LANE_SHARE", "0.8"))
+LIVE_POLL_SECONDS = float(os.getenv("LIVE_POLL_SECONDS", "60"))
+STATE_FLUSH_SECONDS = float(os.getenv("STATE_FLUSH_SECONDS", "60"))
+AIRTABLE_BATCH_SIZE = 10
 QUESTIONS_CACHE: Dict[str, Any] = {}
 AIRTABLE_SCHEMA_CACHE: Optional[Dict[str, Any]] = None
 AIRTABLE_FIELD_TYPES_CACHE: Optional[Dict[str, Any]] = None
 
 JOTFORM_BASE = os.getenv("JOTFORM_BASE", "https://parityinc.jotform.com/API")
+JOTFORM_TIMEZONE = os.getenv("JOTFORM_TIMEZONE", "UTC")
+JOTFORM_PAGE_LIMIT = int(os.getenv("JOTFORM_PAGE_LIMIT", "100"))
+JOTFORM_PAGE_LIMIT_MIN = 10
+JOTFORM_PAGE_LIMIT_MAX = 1000
+JOTFORM_PREFETCH_PAGES = int(os.getenv("JOTFORM_PREFETCH_PAGES", "2"))
+JOTFORM_MAX_IN_FLIGHT = int(os.getenv("JOTFORM_MAX_IN_FLIGHT", "2"))
+JOTFORM_MIN_INTERVAL = float(os.getenv("JOTFORM_MIN_INTERVAL", "0.2"))
+JOTFORM_TARGET_PAGE_SECONDS = 2.0
+JOTFORM_MAX_PAGE_BYTES = 8 * 1024 * 1024
 AIRTABLE_BASE = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{AIRTABLE_TABLE}"
 
+NON_INPUT_QUESTION_TYPES = [
+    "control_head", "control_button", "control_pagebreak",
+    "control_divider", "control_text", "control_image",
+]
+
+# Airtable errors for a PATCH whose record ID no longer exists
+RECORD_NOT_FOUND_ERRORS = ('MODEL_ID_NOT_FOUND', 'ROW_DOES_NOT_EXIST')
+
+# Keys of a JotForm answer object that the mapping code actually reads.
+ANSWER_KEYS = ("answer", "prettyFormat", "value")
+
 JOTFORM_TO_AIRTABLE_TYPES = {
     "control_textbox": "singleLineText",
     "control_textarea": "multilineText",
@@ -109,23 +177,6 @@ def die(msg: str) -> None:
     raise SystemExit(msg)
 
 
-def parse_timestamp(value: Any) -> int:
-    if not value:
-        return 0
-    if isinstance(value, int):
-        return value
-    if isinstance(value, str):
-        try:
-            dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-            return int(dt.timestamp())
-        except ValueError:
-            try:
-                return int(value)
-            except ValueError:
-                return 0
-    return 0
-
-
 def headers_airtable() -> Dict[str, str]:
     return {
         "Authorization": f"Bearer {AIRTABLE_TOKEN}",
@@ -133,15 +184,37 @@ def headers_airtable() -> Dict[str, str]:
     }
 
 
-def jotform_get(path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+# Shared JotForm rate budget: at most JOTFORM_MAX_IN_FLIGHT concurrent
+# requests, started no closer together than JOTFORM_MIN_INTERVAL seconds.
+JOTFORM_IN_FLIGHT = threading.BoundedSemaphore(max(JOTFORM_MAX_IN_FLIGHT, 1))
+JOTFORM_PACE_LOCK = threading.Lock()
+JOTFORM_LAST_REQUEST = 0.0
+
+
+def wait_for_jotform_slot() -> None:
+    global JOTFORM_LAST_REQUEST
+    with JOTFORM_PACE_LOCK:
+        delay = JOTFORM_LAST_REQUEST + JOTFORM_MIN_INTERVAL - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        JOTFORM_LAST_REQUEST = time.monotonic()
+
+
+def jotform_request(path: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
     if not JOTFORM_API_KEY:
         die("Missing JOTFORM_API_KEY")
     url = f"{JOTFORM_BASE}{path}"
     params = params or {}
     params["apiKey"] = JOTFORM_API_KEY
-    r = requests.get(url, params=params, timeout=30)
+    with JOTFORM_IN_FLIGHT:
+        wait_for_jotform_slot()
+        r = requests.get(url, params=params, timeout=30)
     r.raise_for_status()
-    return r.json()
+    return r
+
+
+def jotform_get(path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return jotform_request(path, params).json()
 
 
 def airtable_get(params: Dict[str, Any]) -> Dict[str, Any]:
@@ -175,7 +248,8 @@ def airtable_patch(record_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         try:
             response_data = r.json()
             error_type = response_data.get('error', {}).get('type', '')
-            if error_type in ['INVALID_VALUE_FOR_COLUMN', 'INVALID_MULTIPLE_CHOICE_OPTIONS']:
+            if error_type in ['INVALID_VALUE_FOR_COLUMN', 'INVALID_MULTIPLE_CHOICE_OPTIONS',
+                              *RECORD_NOT_FOUND_ERRORS]:
                 return {'error': response_data.get('error')}
         except (ValueError, KeyError):
             pass
@@ -183,6 +257,26 @@ def airtable_patch(record_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     return r.json()
 
 
+def airtable_patch_records(payload: Dict[str, Any]) -> Dict[str, Any]:
+    r = requests.patch(AIRTABLE_BASE, headers=headers_airtable(), json=payload, timeout=30)
+    if not r.ok:
+        try:
+            response_data = r.json()
+            error_type = response_data.get('error', {}).get('type', '')
+            if error_type in ['INVALID_VALUE_FOR_COLUMN', 'INVALID_MULTIPLE_CHOICE_OPTIONS',
+                              *RECORD_NOT_FOUND_ERRORS]:
+                return {'error': response_data.get('error')}
+        except (ValueError, KeyError):
+            pass
+        r.raise_for_status()
+    return r.json()
+
+
+def record_not_found(result: Dict[str, Any]) -> bool:
+    error = result.get('error')
+    return isinstance(error, dict) and error.get('type') in RECORD_NOT_FOUND_ERRORS
+
+
 def fetch_form_questions() -> Dict[str, Any]:
     global QUESTIONS_CACHE
     if QUESTIONS_CACHE:
@@ -246,17 +340,449 @@ def extract_composite_fields(field_name: str, answer_obj: Any) -> Dict[str, str]
     return result
 
 
-def load_watermark() -> int:
-    if not os.path.exists(WATERMARK_FILE):
-        return 0
-    with open(WATERMARK_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return int(data.get("last_updated_at", 0))
+class UnixSocketHandler(logging.Handler):
+    """Send each change-log entry as one datagram to a local Unix socket.
+
+    Entries are dropped while no consumer is listening, the same as a
+    queue with no subscriber.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.sock.sendto(self.format(record).encode("utf-8"), self.path)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        self.sock.close()
+        super().close()
+
+
+def open_changelog(target: str) -> None:
+    """Route change-log entries to rotated JSONL files or, for a
+    ``unix:<path>`` target, to a local datagram socket."""
+    global CHANGELOG_LOGGER
+    if not target:
+        return
+    if target.startswith("unix:"):
+        handler: logging.Handler = UnixSocketHandler(target[len("unix:"):])
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            target, maxBytes=CHANGELOG_MAX_BYTES,
+            backupCount=CHANGELOG_BACKUPS, encoding="utf-8",
+        )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    CHANGELOG_LOGGER = logging.getLogger("sync.changelog")
+    CHANGELOG_LOGGER.setLevel(logging.INFO)
+    CHANGELOG_LOGGER.propagate = False
+    CHANGELOG_LOGGER.addHandler(handler)
+
+
+def emit_change(op: str, submission_id: str, record_id: str, changed: List[str]) -> None:
+    if CHANGELOG_LOGGER is None:
+        return
+    CHANGELOG_LOGGER.info(json.dumps({
+        "submission_id": submission_id,
+        "record_id": record_id,
+        "op": op,
+        "changed_fields": changed,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }))
+
+
+class StateStore(ABC):
+    """Key/value store for run-to-run state, with JSON values.
+
+    Writes are buffered in memory and persisted by ``flush``, so the hot
+    loop never rewrites the backing file/database per submission.
+    """
+
+    def __init__(self):
+        self.cache: Dict[str, Any] = {}
+        self.dirty: set = set()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self.cache:
+            self.cache[key] = self.load(key)
+        value = self.cache[key]
+        return default if value is None else value
+
+    def set(self, key: str, value: Any) -> None:
+        self.cache[key] = value
+        self.dirty.add(key)
+
+    def flush(self) -> None:
+        if self.dirty:
+            self.write({key: self.cache[key] for key in self.dirty})
+            self.dirty.clear()
+
+    @abstractmethod
+    def load(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    def write(self, items: Dict[str, Any]) -> None:
+        ...
+
+
+class FileStateStore(StateStore):
+    """All state in one JSON object; compatible with the old watermark.json."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.data: Optional[Dict[str, Any]] = None
+
+    def read(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load(self, key: str) -> Any:
+        if self.data is None:
+            self.data = self.read()
+        return self.data.get(key)
+
+    def write(self, items: Dict[str, Any]) -> None:
+        # Re-read so keys written by other workers since we loaded survive
+        data = self.read()
+        data.update(items)
+        tmp = f"{self.path}.{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+
+class SqliteStateStore(StateStore):
+    def __init__(self, path: str):
+        super().__init__()
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+
+    def load(self, key: str) -> Any:
+        row = self.conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write(self, items: Dict[str, Any]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in items.items()],
+            )
+
+
+class DbmStateStore(StateStore):
+    """State in a local dbm key/value database.
+
+    The database stays open between flushes, and dbm allows only one
+    writer, so this backend suits single-process runs.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.db: Any = dbm.open(path, "c")
+
+    def handle(self) -> Any:
+        if self.db is None:
+            self.db = dbm.open(self.path, "c")
+        return self.db
+
+    def load(self, key: str) -> Any:
+        value = self.handle().get(key)
+        return json.loads(value) if value is not None else None
+
+    def write(self, items: Dict[str, Any]) -> None:
+        db = self.handle()
+        for key, value in items.items():
+            db[key] = json.dumps(value)
+
+    def flush(self) -> None:
+        super().flush()
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+STATE_BACKENDS = {
+    "file": FileStateStore,
+    "sqlite": SqliteStateStore,
+    "dbm": DbmStateStore,
+}
+STATE_STORE: Optional[StateStore] = None
+
+
+def get_state_store() -> StateStore:
+    global STATE_STORE
+    if STATE_STORE is None:
+        if STATE_BACKEND not in STATE_BACKENDS:
+            die(f"Unknown STATE_BACKEND: {STATE_BACKEND}")
+        state_dir = os.path.dirname(os.path.abspath(STATE_PATH))
+        os.makedirs(state_dir, exist_ok=True)
+        STATE_STORE = STATE_BACKENDS[STATE_BACKEND](STATE_PATH)
+    return STATE_STORE
+
+
+def load_watermark(shard: Optional[str] = None) -> int:
+    store = get_state_store()
+    if shard is not None and store.get(f"last_updated_at:{shard}") is not None:
+        return int(store.get(f"last_updated_at:{shard}"))
+    ts = store.get("last_updated_at")
+    if ts is None and os.path.abspath(STATE_PATH) != WATERMARK_FILE:
+        # First run on a new backend: continue from the legacy watermark
+        ts = FileStateStore(WATERMARK_FILE).load("last_updated_at")
+    return int(ts or 0)
+
+
+def save_watermark(ts: int, shard: Optional[str] = None) -> None:
+    store = get_state_store()
+    store.set("last_updated_at" if shard is None else f"last_updated_at:{shard}", int(ts))
+    store.flush()
+
+
+class LeaseBackend(ABC):
+    """Named, expiring leases shared by every sync process.
+
+    A lease held by another owner blocks ``acquire`` until it expires, so a
+    crashed worker never blocks the others for longer than its TTL.
+    """
+
+    @abstractmethod
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        ...
+
+    def renew(self, name: str, owner: str, ttl: float) -> bool:
+        return self.acquire(name, owner, ttl)
+
+    @abstractmethod
+    def release(self, name: str, owner: str) -> None:
+        ...
+
+
+class FileLeaseBackend(LeaseBackend):
+    """Leases as JSON files in a local directory, guarded by flock."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.lease")
+
+    @contextmanager
+    def guard(self):
+        with open(os.path.join(self.directory, ".guard"), "a") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def read(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        with self.guard():
+            current = self.read(name)
+            now = time.time()
+            if current and current.get("owner") != owner and current.get("expires", 0) > now:
+                return False
+            tmp = f"{self.path(name)}.{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"owner": owner, "expires": now + ttl}, f)
+            os.replace(tmp, self.path(name))
+            return True
+
+    def release(self, name: str, owner: str) -> None:
+        with self.guard():
+            current = self.read(name)
+            if current and current.get("owner") == owner:
+                os.remove(self.path(name))
+
+
+LEASE_BACKENDS = {
+    "file": lambda: FileLeaseBackend(LEASE_DIR),
+}
+
+
+def get_lease_backend() -> LeaseBackend:
+    if LEASE_BACKEND not in LEASE_BACKENDS:
+        die(f"Unknown LEASE_BACKEND: {LEASE_BACKEND}")
+    return LEASE_BACKENDS[LEASE_BACKEND]()
+
+
+@contextmanager
+def hold_lease(
+    backend: LeaseBackend,
+    name: str,
+    timeout: float = 60.0,
+    ttl: float = LEASE_TTL
+):
+    """Wait up to ``timeout`` seconds for ``name``, hold it, then release it."""
+    deadline = time.monotonic() + timeout
+    while not backend.acquire(name, LEASE_OWNER, ttl):
+        if time.monotonic() > deadline:
+            die(f"Timed out waiting for lease '{name}'")
+        time.sleep(0.5)
+    try:
+        yield
+    finally:
+        backend.release(name, LEASE_OWNER)
+
+
+def shard_lease_name(shard: int) -> str:
+    return f"shard-{shard}-of-{SYNC_SHARDS}"
+
+
+def shard_watermark_key(shard: int) -> Optional[str]:
+    # A single shard keeps using the top-level watermark
+    return None if SYNC_SHARDS == 1 else f"{shard}/{SYNC_SHARDS}"
+
+
+def submission_shard(submission_id: str) -> int:
+    if submission_id.isdigit():
+        return int(submission_id) % SYNC_SHARDS
+    return int(hashlib.sha1(submission_id.encode("utf-8")).hexdigest(), 16) % SYNC_SHARDS
+
+
+def renew_shards(backend: LeaseBackend, shards: List[int]) -> None:
+    """Renew shard leases in place, dropping any another worker took over."""
+    for shard in list(shards):
+        if not backend.renew(shard_lease_name(shard), LEASE_OWNER, LEASE_TTL):
+            print(f"lost lease on shard {shard}")
+            shards.remove(shard)
+
+
+def claim_shards(backend: LeaseBackend) -> List[int]:
+    """Lease this worker's share of the shards that nobody else holds."""
+    share = -(-SYNC_SHARDS // SYNC_WORKERS)
+    claimed: List[int] = []
+    for shard in range(SYNC_SHARDS):
+        if len(claimed) >= share:
+            break
+        if backend.acquire(shard_lease_name(shard), LEASE_OWNER, LEASE_TTL):
+            claimed.append(shard)
+    return claimed
+
+
+def attachment_key(url: str) -> str:
+    # Upload URLs point at personal files; only a digest is persisted.
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+def attachment_field_names() -> List[str]:
+    _, at_field_types = get_airtable_schema()
+    return [
+        name for name, info in at_field_types.items()
+        if info.get("type") == "multipleAttachments"
+    ]
+
+
+def attachment_urls(fields: Dict[str, Any]) -> Dict[str, List[str]]:
+    urls = {}
+    for field in attachment_field_names():
+        attachments = fields.get(field)
+        if attachments:
+            urls[field] = [a["url"] for a in attachments]
+    return urls
+
+
+def dedupe_attachments(record_id: Optional[str], fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Send already-uploaded files by attachment ID, and leave a field out
+    entirely when the record already holds exactly those files, so Airtable
+    does not download them again."""
+    known = get_state_store().get(f"attachments:{record_id}", {}) if record_id else {}
+    if not known:
+        return fields
+    result = dict(fields)
+    for field, urls in attachment_urls(fields).items():
+        field_known = known.get(field, {})
+        keys = [attachment_key(url) for url in urls]
+        if set(keys) == set(field_known):
+            del result[field]
+            continue
+        result[field] = [
+            {"id": field_known[key]} if key in field_known else attachment
+            for key, attachment in zip(keys, fields[field])
+        ]
+    return result
+
+
+def remember_attachments(
+    record_id: Optional[str],
+    urls_by_field: Dict[str, List[str]],
+    record_fields: Dict[str, Any]
+) -> None:
+    if not record_id or not urls_by_field:
+        return
+    store = get_state_store()
+    known = dict(store.get(f"attachments:{record_id}", {}))
+    for field, urls in urls_by_field.items():
+        uploaded = record_fields.get(field) or []
+        # Airtable keeps attachments in the order they were sent
+        if len(uploaded) != len(urls):
+            continue
+        known[field] = {
+            attachment_key(url): attachment["id"]
+            for url, attachment in zip(urls, uploaded)
+        }
+    if known:
+        store.set(f"attachments:{record_id}", known)
 
 
-def save_watermark(ts: int) -> None:
-    with open(WATERMARK_FILE, "w", encoding="utf-8") as f:
-        json.dump({"last_updated_at": int(ts)}, f)
+def field_hashes(fields: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        name: hashlib.sha1(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        for name, value in fields.items()
+    }
+
+
+def fields_hash(hashes: Dict[str, str]) -> str:
+    return hashlib.sha1(json.dumps(hashes, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def remember_submission(
+    submission_id: str,
+    record_id: Optional[str],
+    op: str,
+    hashes: Dict[str, str]
+) -> None:
+    """Store what was written for a submission and emit its change-log entry."""
+    if not record_id:
+        return
+    store = get_state_store()
+    previous = store.get(f"submission:{submission_id}", {}).get("fields", {})
+    changed = sorted(
+        name for name, digest in hashes.items()
+        if op == "create" or previous.get(name) != digest
+    )
+    store.set(f"submission:{submission_id}", {
+        "record_id": record_id,
+        "hash": fields_hash(hashes),
+        "fields": hashes,
+    })
+    emit_change(op, submission_id, record_id, changed)
+
+
+def forget_submission(submission_id: str, record_id: str) -> None:
+    """Drop what is stored for a record that was deleted in Airtable."""
+    store = get_state_store()
+    store.set(f"submission:{submission_id}", {})
+    store.set(f"attachments:{record_id}", {})
 
 
 def find_record_by_submission_id(submission_id: str) -> Optional[str]:
@@ -271,6 +797,43 @@ def find_record_by_submission_id(submission_id: str) -> Optional[str]:
     return None
 
 
+def find_records_by_submission_ids(submission_ids: List[str]) -> Dict[str, str]:
+    """Look up several submissions in one request; returns the ones found."""
+    if not submission_ids:
+        return {}
+    clauses = []
+    for submission_id in submission_ids:
+        safe = submission_id.replace("'", "''")
+        clauses.append(f"{{{SUBMISSION_ID_FIELD}}}='{safe}'")
+    resp = airtable_get({
+        "filterByFormula": f"OR({','.join(clauses)})",
+        "fields[]": SUBMISSION_ID_FIELD,
+    })
+    found: Dict[str, str] = {}
+    for record in resp.get("records", []):
+        submission_id = record.get("fields", {}).get(SUBMISSION_ID_FIELD)
+        if submission_id:
+            found[str(submission_id)] = record["id"]
+    return found
+
+
+def fetch_record_index() -> Dict[str, str]:
+    """Map every Submission ID in the table to its Airtable record ID."""
+    index: Dict[str, str] = {}
+    params: Dict[str, Any] = {"fields[]": SUBMISSION_ID_FIELD, "pageSize": 100}
+    while True:
+        resp = airtable_get(params)
+        for record in resp.get("records", []):
+            submission_id = record.get("fields", {}).get(SUBMISSION_ID_FIELD)
+            if submission_id:
+                index[str(submission_id)] = record["id"]
+        offset = resp.get("offset")
+        if not offset:
+            break
+        params["offset"] = offset
+    return index
+
+
 def to_airtable_attachments(file_urls: List[str]) -> List[Dict[str, str]]:
     attachments = []
     for url in file_urls:
@@ -296,20 +859,158 @@ def extract_urls_from_one_answer(answer_obj: Any) -> List[str]:
     return found
 
 
-def fetch_all_submissions() -> List[Dict[str, Any]]:
-    submissions: List[Dict[str, Any]] = []
+class CompactSubmission(NamedTuple):
+    """A submission reduced to what the sync needs: id, timestamps and the
+    packed answers of mapped questions.
+
+    ``answers`` lines up with ``qids``, a tuple shared by every record of
+    a run, with None for unanswered questions.
+    """
+    id: str
+    created_at: Any
+    updated_at: Any
+    qids: Tuple[str, ...]
+    answers: Tuple[Any, ...]
+
+
+def mapped_question_ids() -> Tuple[str, ...]:
+    return tuple(
+        qid for qid, question in fetch_form_questions().items()
+        if question.get("name")
+        and question.get("type", "") not in NON_INPUT_QUESTION_TYPES
+    )
+
+
+def pack_answer(answer_obj: Any, question: Dict[str, Any]) -> Any:
+    """Keep only the parts of an answer object the mapping code reads:
+    a bare value where that converts identically, else a tuple of
+    ``ANSWER_KEYS`` values.
+
+    Raw JSON never contains tuples, so a tuple always means a packed dict.
+    """
+    if not isinstance(answer_obj, dict):
+        return answer_obj
+    name = question.get("name", "")
+    if name in COMPOSITE_FIELDS:
+        answer = answer_obj.get("answer")
+        if isinstance(answer, dict):
+            mapping = COMPOSITE_FIELDS[name]
+            answer = {k: v for k, v in answer.items() if k in mapping and v}
+        return (answer,)
+    qtype = question.get("type")
+    if qtype != "control_fileupload":
+        # get_answer_value only ever reads prettyFormat, falling back to answer
+        value = answer_obj.get("prettyFormat") or answer_obj.get("answer")
+        # A bare value converts the same as its dict, except a checkbox
+        # string or a dict value (e.g. a matrix), which would be read as
+        # an answer object itself
+        if qtype == "control_checkbox" or isinstance(value, dict):
+            return (value,)
+        return value
+    values = [answer_obj.get(k) for k in ANSWER_KEYS]
+    if values[1] == values[0]:
+        values[1] = None
+    while values and values[-1] is None:
+        values.pop()
+    return tuple(values)
+
+
+def unpack_answer(packed: Any) -> Any:
+    if not isinstance(packed, tuple):
+        return packed
+    return {k: v for k, v in zip(ANSWER_KEYS, packed) if v is not None}
+
+
+def submission_answers(submission: CompactSubmission) -> Dict[str, Any]:
+    return {
+        qid: unpack_answer(packed)
+        for qid, packed in zip(submission.qids, submission.answers)
+        if packed is not None
+    }
+
+
+def project_submission(submission: Dict[str, Any], qids: Tuple[str, ...]) -> CompactSubmission:
+    raw_answers = submission.get("answers", {}) or {}
+    questions = fetch_form_questions()
+    answers = [pack_answer(raw_answers.get(qid), questions[qid]) for qid in qids]
+    while answers and answers[-1] is None:
+        answers.pop()
+    return CompactSubmission(
+        id=str(submission.get("id", "")),
+        created_at=submission.get("created_at"),
+        updated_at=submission.get("updated_at"),
+        qids=qids,
+        answers=tuple(answers),
+    )
+
+
+def fetch_submission_page(offset: int, limit: int):
+    """Fetch one raw page; return (page, seconds taken, response bytes)."""
+    started = time.monotonic()
+    r = jotform_request(
+        f"/form/{JOTFORM_FORM_ID}/submissions", {"limit": limit, "offset": offset}
+    )
+    page = r.json().get("content", []) or []
+    return page, time.monotonic() - started, len(r.content)
+
+
+def next_page_limit(limit: int, elapsed: float, size: int, count: int) -> int:
+    """Grow pages while they come back fast, shrink them when slow or large."""
+    if elapsed < JOTFORM_TARGET_PAGE_SECONDS / 2:
+        limit *= 2
+    elif elapsed > JOTFORM_TARGET_PAGE_SECONDS:
+        limit //= 2
+    if count and size:
+        limit = min(limit, JOTFORM_MAX_PAGE_BYTES * count // size)
+    return max(JOTFORM_PAGE_LIMIT_MIN, min(limit, JOTFORM_PAGE_LIMIT_MAX))
+
+
+def prefetch_depth() -> int:
+    return max(0, min(JOTFORM_PREFETCH_PAGES, JOTFORM_MAX_IN_FLIGHT))
+
+
+def iter_submission_pages():
+    """Yield pages of compact submissions, prefetching upcoming pages in
+    the background while the caller processes the current one."""
+    qids = mapped_question_ids()
+    depth = prefetch_depth()
+    limit = JOTFORM_PAGE_LIMIT
     offset = 0
-    limit = 100
-    while True:
-        resp = jotform_get(f"/form/{JOTFORM_FORM_ID}/submissions", {"limit": limit, "offset": offset})
-        page = resp.get("content", [])
-        if not page:
-            break
-        submissions.extend(page)
+    pending: deque = deque()
+    pool = ThreadPoolExecutor(max_workers=max(depth, 1))
+
+    def schedule() -> None:
+        nonlocal offset
+        pending.append((limit, pool.submit(fetch_submission_page, offset, limit)))
         offset += limit
-        if limit and len(page) < limit:
-            break
-    return submissions
+
+    try:
+        schedule()
+        while pending:
+            page_limit, future = pending.popleft()
+            page, elapsed, size = future.result()
+            last = len(page) < page_limit
+            if page:
+                limit = next_page_limit(limit, elapsed, size, len(page))
+            if not last:
+                while len(pending) < depth:
+                    schedule()
+            if page:
+                yield [project_submission(s, qids) for s in page]
+            if last:
+                break
+            if not pending:
+                schedule()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_all_submissions() -> List[CompactSubmission]:
+    return [s for page in iter_submission_pages() for s in page]
+
+
+def submission_updated_at(submission: CompactSubmission) -> int:
+    return parse_timestamp(submission.updated_at or submission.created_at)
 
 
 def convert_value_for_airtable(
@@ -355,14 +1056,11 @@ def convert_value_for_airtable(
     # Handle date/datetime fields
     elif at_field_type in ["date", "dateTime"]:
         if isinstance(value, str):
-            try:
-                # Parse various date formats
-                # JotForm typically uses YYYY-MM-DD format
-                dt = datetime.strptime(value.split()[0], "%Y-%m-%d")
-                return dt.strftime("%Y-%m-%d")
-            except (ValueError, IndexError):
+            # JotForm typically uses YYYY-MM-DD format
+            date = parse_date(value)
+            if date is None:
                 print(f"Warning: Cannot parse date '{value}' for '{field_name}'")
-                return None
+            return date
         return None
 
     # Handle phone number fields
@@ -382,21 +1080,21 @@ def convert_value_for_airtable(
         return str(value) if value else None
 
 
-def upsert_to_airtable(submission: Dict[str, Any], dry_run: bool = False) -> None:
-    submission_id = str(submission.get("id", ""))
+def build_airtable_fields(submission: CompactSubmission) -> Dict[str, Any]:
+    """Map a JotForm submission to the Airtable fields payload."""
+    submission_id = submission.id
 
     fields: Dict[str, Any] = {SUBMISSION_ID_FIELD: submission_id}
 
     questions = fetch_form_questions()
-    answers = submission.get("answers", {}) or {}
+    answers = submission_answers(submission)
     _, at_field_types = get_airtable_schema()
 
     for qid, question in questions.items():
         field_name = question.get("name", "")
         qtype = question.get("type", "")
 
-        if qtype in ["control_head", "control_button", "control_pagebreak",
-                     "control_divider", "control_text", "control_image"]:
+        if qtype in NON_INPUT_QUESTION_TYPES:
             continue
 
         if not field_name:
@@ -436,16 +1134,45 @@ def upsert_to_airtable(submission: Dict[str, Any], dry_run: bool = False) -> Non
         if field_name in valid_fields:
             filtered_fields[field_name] = field_value
 
-    record_id = find_record_by_submission_id(submission_id)
+    return filtered_fields
+
+
+def upsert_to_airtable(
+    submission: CompactSubmission,
+    dry_run: bool = False,
+    force: bool = False
+) -> None:
+    submission_id = submission.id
+    filtered_fields = build_airtable_fields(submission)
 
     if dry_run:
-        print(f"[dry-run] {submission_id}")
+        print(f"[dry-run] {submission_id}: {len(filtered_fields)} fields")
         return
 
-    payload = {"fields": filtered_fields}
+    known = get_state_store().get(f"submission:{submission_id}", {})
+    hashes = field_hashes(filtered_fields)
+    if not force and known.get("hash") == fields_hash(hashes):
+        print(f"unchanged {submission_id}")
+        return
+
+    urls = attachment_urls(filtered_fields)
+    record_id = known.get("record_id")
+    if record_id:
+        result = airtable_patch(
+            record_id, {"fields": dedupe_attachments(record_id, filtered_fields)}
+        )
+        if record_not_found(result):
+            print(f"record {record_id} for {submission_id} was deleted; looking it up again")
+            forget_submission(submission_id, record_id)
+            record_id = None
+    if not record_id:
+        record_id = find_record_by_submission_id(submission_id)
+        if record_id:
+            result = airtable_patch(
+                record_id, {"fields": dedupe_attachments(record_id, filtered_fields)}
+            )
 
     if record_id:
-        result = airtable_patch(record_id, payload)
         if 'error' in result:
             error_info = result.get('error', {})
             error_type = error_info.get('type', 'unknown')
@@ -453,8 +1180,10 @@ def upsert_to_airtable(submission: Dict[str, Any], dry_run: bool = False) -> Non
             print(f"Error updating {submission_id}: {error_type} - {error_msg}")
         else:
             print(f"updated {submission_id}")
+            remember_attachments(record_id, urls, result.get("fields", {}))
+            remember_submission(submission_id, record_id, "update", hashes)
     else:
-        result = airtable_post(payload)
+        result = airtable_post({"fields": filtered_fields})
         if 'error' in result:
             error_info = result.get('error', {})
             error_type = error_info.get('type', 'unknown')
@@ -462,6 +1191,8 @@ def upsert_to_airtable(submission: Dict[str, Any], dry_run: bool = False) -> Non
             print(f"Error creating {submission_id}: {error_type} - {error_msg}")
         else:
             print(f"created {submission_id}")
+            remember_attachments(result.get("id"), urls, result.get("fields", {}))
+            remember_submission(submission_id, result.get("id"), "create", hashes)
 
     time.sleep(0.25)
 
@@ -665,18 +1396,506 @@ def delete_orphaned_fields():
     return len(orphaned_fields)
 
 
+def load_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """Load a local snapshot and prime the questions/schema caches from it."""
+    global QUESTIONS_CACHE, AIRTABLE_FIELD_TYPES_CACHE
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    QUESTIONS_CACHE = data.get("questions", {})
+    AIRTABLE_FIELD_TYPES_CACHE = (
+        data.get("airtable_table_id", ""),
+        data.get("airtable_fields", {}),
+    )
+    return data
+
+
+def save_snapshot(
+    path: str,
+    submissions: List[CompactSubmission],
+    record_index: Dict[str, str]
+) -> None:
+    table_id, field_map = get_airtable_schema()
+    data = {
+        "questions": fetch_form_questions(),
+        "airtable_table_id": table_id,
+        "airtable_fields": field_map,
+        "submissions": [
+            {
+                "id": s.id,
+                "created_at": s.created_at,
+                "updated_at": s.updated_at,
+                "answers": submission_answers(s),
+            }
+            for s in submissions
+        ],
+        "record_index": record_index,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def write_plan(
+    path: str,
+    submissions: List[CompactSubmission],
+    record_index: Dict[str, str],
+    last_watermarks: Dict[int, int],
+    force: bool = False
+) -> int:
+    """Write one JSONL entry per planned create/update; return the count.
+
+    ``last_watermarks`` maps each shard to its stored watermark.
+    """
+    planned = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for s in submissions:
+            updated_at = submission_updated_at(s)
+            if updated_at <= last_watermarks[submission_shard(s.id)]:
+                continue
+            submission_id = s.id
+            known = get_state_store().get(f"submission:{submission_id}", {})
+            record_id = record_index.get(submission_id) or known.get("record_id")
+            fields = build_airtable_fields(s)
+            hashes = field_hashes(fields)
+            if not force and known.get("hash") == fields_hash(hashes):
+                continue
+            entry = {
+                "op": "update" if record_id else "create",
+                "submission_id": submission_id,
+                "record_id": record_id,
+                "updated_at": updated_at,
+                "fields": dedupe_attachments(record_id, fields),
+                "attachment_urls": attachment_urls(fields),
+                "field_hashes": hashes,
+            }
+            f.write(json.dumps(entry) + "\n")
+            planned += 1
+    return planned
+
+
+def read_plan(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        die(f"Plan file not found: {path}")
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
+
+
+def apply_plan_entry(entry: Dict[str, Any]) -> None:
+    submission_id = entry["submission_id"]
+    payload = {"fields": entry["fields"]}
+    if entry["op"] == "update":
+        result = airtable_patch(entry["record_id"], payload)
+        action = "updating"
+        if record_not_found(result):
+            # The snapshot's record was deleted; its attachment IDs went with it
+            print(f"record {entry['record_id']} for {submission_id} was deleted; looking it up again")
+            forget_submission(submission_id, entry["record_id"])
+            fields = dict(entry["fields"])
+            for field, urls in entry.get("attachment_urls", {}).items():
+                fields[field] = to_airtable_attachments(urls)
+            entry["fields"] = fields
+            found = find_record_by_submission_id(submission_id)
+            entry["record_id"] = found if found != entry["record_id"] else None
+            if not entry["record_id"]:
+                entry["op"] = "create"
+            apply_plan_entry(entry)
+            return
+    else:
+        result = airtable_post(payload)
+        action = "creating"
+    if 'error' in result:
+        error_info = result.get('error', {})
+        error_type = error_info.get('type', 'unknown')
+        error_msg = error_info.get('message', 'no message')
+        print(f"Error {action} {submission_id}: {error_type} - {error_msg}")
+    else:
+        print(f"{'updated' if entry['op'] == 'update' else 'created'} {submission_id}")
+        remember_attachments(
+            result.get("id"), entry.get("attachment_urls", {}), result.get("fields", {})
+        )
+        remember_submission(
+            submission_id, result.get("id"), entry["op"], entry.get("field_hashes", {})
+        )
+    time.sleep(0.25)
+
+
+def apply_plan_batch(op: str, batch: List[Dict[str, Any]]) -> None:
+    if op == "update":
+        records = [{"id": e["record_id"], "fields": e["fields"]} for e in batch]
+        result = airtable_patch_records({"records": records})
+    else:
+        records = [{"fields": e["fields"]} for e in batch]
+        result = airtable_post({"records": records})
+
+    if 'error' in result:
+        # One bad value rejects the whole batch; retry record by record
+        # so only the offending submission is reported.
+        for entry in batch:
+            apply_plan_entry(entry)
+        return
+
+    for entry, record in zip(batch, result.get("records", [])):
+        print(f"{'updated' if op == 'update' else 'created'} {entry['submission_id']}")
+        remember_attachments(
+            record.get("id"), entry.get("attachment_urls", {}), record.get("fields", {})
+        )
+        remember_submission(
+            entry["submission_id"], record.get("id"), op, entry.get("field_hashes", {})
+        )
+    time.sleep(0.25)
+
+
+def resolve_creates(batch: List[Dict[str, Any]]) -> None:
+    """Turn planned creates whose record already exists into updates.
+
+    A plan may be applied twice, or re-applied after a crash, and the
+    snapshot it was built from can be stale; POSTing again would leave
+    duplicate rows.
+    """
+    store = get_state_store()
+    unknown = []
+    for entry in batch:
+        if entry["op"] != "create":
+            continue
+        record_id = store.get(f"submission:{entry['submission_id']}", {}).get("record_id")
+        if record_id:
+            entry["op"], entry["record_id"] = "update", record_id
+        else:
+            unknown.append(entry)
+    found = find_records_by_submission_ids([e["submission_id"] for e in unknown])
+    for entry in unknown:
+        if entry["submission_id"] in found:
+            entry["op"], entry["record_id"] = "update", found[entry["submission_id"]]
+
+
+def apply_plan(
+    entries: List[Dict[str, Any]],
+    backend: LeaseBackend,
+    shards: List[int]
+) -> Dict[int, int]:
+    """Execute plan entries as batched writes; return the newest
+    updated_at applied for each shard.
+
+    ``shards`` are the shard leases held for these entries; they are
+    renewed after every batch.
+    """
+    newest_seen: Dict[int, int] = {}
+    creates = [e for e in entries if e.get("op") == "create"]
+    for i in range(0, len(creates), AIRTABLE_BATCH_SIZE):
+        resolve_creates(creates[i:i + AIRTABLE_BATCH_SIZE])
+    for op in ["create", "update"]:
+        pending = [e for e in entries if e.get("op") == op]
+        for i in range(0, len(pending), AIRTABLE_BATCH_SIZE):
+            apply_plan_batch(op, pending[i:i + AIRTABLE_BATCH_SIZE])
+            # Persist each batch so a crash mid-plan cannot re-create it
+            with hold_lease(backend, "state"):
+                get_state_store().flush()
+            renew_shards(backend, shards)
+        for entry in pending:
+            shard = submission_shard(entry["submission_id"])
+            newest_seen[shard] = max(newest_seen.get(shard, 0), int(entry.get("updated_at", 0)))
+    print(f"applied {len(entries)} planned changes")
+    return newest_seen
+
+
+def run_plan(args) -> None:
+    snapshot = None if args.refresh_snapshot else load_snapshot(args.snapshot)
+    if snapshot is not None:
+        print(f"using snapshot {args.snapshot}")
+        qids = mapped_question_ids()
+        submissions = [project_submission(s, qids) for s in snapshot.get("submissions", [])]
+        record_index = snapshot.get("record_index", {})
+    else:
+        submissions = fetch_all_submissions()
+        record_index = fetch_record_index()
+        save_snapshot(args.snapshot, submissions, record_index)
+
+    last_watermarks = {
+        shard: 0 if args.ignore_watermark else load_watermark(shard_watermark_key(shard))
+        for shard in range(SYNC_SHARDS)
+    }
+    planned = write_plan(
+        args.plan_file, submissions, record_index, last_watermarks,
+        force=args.ignore_watermark
+    )
+    print(f"planned {planned} changes to {args.plan_file}")
+
+
+def run_apply(args) -> None:
+    backend = get_lease_backend()
+    entries = read_plan(args.plan_file)
+    # Take the same shard leases sync does, so the two never write the
+    # same submissions at once.
+    wanted = sorted({submission_shard(e["submission_id"]) for e in entries})
+    shards = [
+        shard for shard in wanted
+        if backend.acquire(shard_lease_name(shard), LEASE_OWNER, LEASE_TTL)
+    ]
+    try:
+        runnable = [e for e in entries if submission_shard(e["submission_id"]) in shards]
+        skipped = [e for e in entries if submission_shard(e["submission_id"]) not in shards]
+        newest_seen = apply_plan(runnable, backend, shards)
+        # Only the shards applied here advance; skipped entries stay above
+        # their shard's watermark, so the next plan still includes them.
+        with hold_lease(backend, "state"):
+            get_state_store().flush()
+            for shard, newest in newest_seen.items():
+                if newest > load_watermark(shard_watermark_key(shard)):
+                    save_watermark(newest, shard_watermark_key(shard))
+                    print(f"updated watermark")
+        if skipped:
+            with open(args.plan_file, "w", encoding="utf-8") as f:
+                for entry in skipped:
+                    f.write(json.dumps(entry) + "\n")
+            print(f"skipped {len(skipped)} changes on shards leased by other workers; "
+                  f"they remain in {args.plan_file}")
+        else:
+            os.replace(args.plan_file, f"{args.plan_file}.applied")
+            print(f"plan moved to {args.plan_file}.applied")
+    finally:
+        for shard in shards:
+            backend.release(shard_lease_name(shard), LEASE_OWNER)
+
+
+class LaneScheduler:
+    """Work queue with a live and a bulk lane feeding one Airtable writer.
+
+    While both lanes have work, live items get at least ``live_share`` of
+    the writes; either lane may use every slot the other leaves idle.
+    """
+
+    def __init__(self, live_share: float):
+        self.live_share = live_share
+        self.lanes: Dict[str, deque] = {"live": deque(), "bulk": deque()}
+        # Only slots where both lanes were waiting count against the share
+        self.contested = {"live": 0, "bulk": 0}
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def put(self, lane: str, item: Any) -> None:
+        with self.cond:
+            self.lanes[lane].append(item)
+            self.cond.notify()
+
+    def close(self) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def pending(self, lane: str) -> int:
+        with self.cond:
+            return len(self.lanes[lane])
+
+    def wait_for_room(self, limit: int, timeout: float) -> bool:
+        """Block while more than ``limit`` items are queued; False on timeout."""
+        with self.cond:
+            return self.cond.wait_for(
+                lambda: self.closed
+                or len(self.lanes["live"]) + len(self.lanes["bulk"]) <= limit,
+                timeout,
+            )
+
+    def wait_for_bulk_drain(self, timeout: float) -> bool:
+        with self.cond:
+            return self.cond.wait_for(
+                lambda: self.closed or not self.lanes["bulk"], timeout
+            )
+
+    def get(self) -> Optional[Any]:
+        """Next item to write, blocking until one is queued; None when done."""
+        with self.cond:
+            live, bulk = self.lanes["live"], self.lanes["bulk"]
+            while not live and not bulk and not self.closed:
+                self.cond.wait()
+            if not live and not bulk:
+                return None
+            if not bulk:
+                lane = "live"
+            elif not live:
+                lane = "bulk"
+            else:
+                total = self.contested["live"] + self.contested["bulk"]
+                lane = "live" if self.contested["live"] < self.live_share * (total + 1) else "bulk"
+                self.contested[lane] += 1
+            # Wake a producer waiting for room
+            self.cond.notify_all()
+            return self.lanes[lane].popleft()
+
+
+def run_sync(args) -> None:
+    backend = get_lease_backend()
+    shards = claim_shards(backend)
+    if not shards:
+        print("all shards are leased by other workers; nothing to do")
+        return
+    if SYNC_SHARDS > 1:
+        print(f"syncing shards {shards} of {SYNC_SHARDS}")
+
+    try:
+        stored_watermarks = {
+            shard: load_watermark(shard_watermark_key(shard)) for shard in shards
+        }
+        last_watermarks = {
+            shard: 0 if args.ignore_watermark else stored_watermarks[shard]
+            for shard in shards
+        }
+        newest_seen = dict(last_watermarks)
+        scheduler = LaneScheduler(LIVE_LANE_SHARE)
+        queued: Dict[str, int] = {}
+        queue_lock = threading.Lock()
+        fetch_errors: List[BaseException] = []
+        fetched = 0
+        processed = 0
+
+        def enqueue(page: List[CompactSubmission]) -> None:
+            # Anything newer than the stored watermark is live; older
+            # submissions only come through on --ignore-watermark backfills.
+            with queue_lock:
+                for s in page:
+                    shard = submission_shard(s.id)
+                    if shard not in shards:
+                        continue
+                    updated_at = submission_updated_at(s)
+                    if updated_at <= max(last_watermarks[shard], queued.get(s.id, 0)):
+                        continue
+                    queued[s.id] = updated_at
+                    lane = "live" if updated_at > stored_watermarks[shard] else "bulk"
+                    scheduler.put(lane, (s, shard, updated_at))
+
+        poll_since = min(stored_watermarks.values())
+
+        def poll_live() -> None:
+            # A long backfill must not hide submissions created or edited
+            # while it runs, wherever they sit in the paging order.
+            nonlocal poll_since
+            since = format_timestamp(poll_since)
+            newest = poll_since
+            qids = mapped_question_ids()
+            try:
+                for field in ("updated_at", "created_at"):
+                    resp = jotform_get(f"/form/{JOTFORM_FORM_ID}/submissions", {
+                        "limit": JOTFORM_PAGE_LIMIT_MAX,
+                        "filter": json.dumps({f"{field}:gt": since}),
+                    })
+                    page = [project_submission(raw, qids) for raw in resp.get("content", []) or []]
+                    enqueue(page)
+                    newest = max([newest] + [submission_updated_at(s) for s in page])
+            except (requests.RequestException, ValueError) as e:
+                print(f"live poll failed: {e}")
+                return
+            poll_since = newest
+
+        def produce() -> None:
+            nonlocal fetched
+            depth = max(prefetch_depth(), 1)
+            try:
+                for page in iter_submission_pages():
+                    fetched += len(page)
+                    enqueue(page)
+                    # Stay at most `depth` pages ahead of the writer
+                    while not scheduler.wait_for_room(depth * len(page), LIVE_POLL_SECONDS):
+                        if scheduler.pending("bulk"):
+                            poll_live()
+                    if scheduler.closed:
+                        return
+                while not scheduler.wait_for_bulk_drain(LIVE_POLL_SECONDS):
+                    poll_live()
+            except BaseException as e:
+                fetch_errors.append(e)
+            finally:
+                scheduler.close()
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        last_renewal = last_flush = time.monotonic()
+
+        try:
+            while True:
+                item = scheduler.get()
+                if item is None:
+                    break
+                s, shard, updated_at = item
+                if shard not in shards:
+                    continue
+                upsert_to_airtable(s, dry_run=args.dry_run, force=args.ignore_watermark)
+                processed += 1
+                if updated_at > newest_seen[shard]:
+                    newest_seen[shard] = updated_at
+
+                now = time.monotonic()
+                if now - last_renewal > LEASE_TTL / 3:
+                    renew_shards(backend, shards)
+                    last_renewal = now
+                if not args.dry_run and now - last_flush > STATE_FLUSH_SECONDS:
+                    # Keep record IDs and hashes if the run is cut short
+                    with hold_lease(backend, "state"):
+                        get_state_store().flush()
+                    last_flush = now
+        finally:
+            # Stops the producer if the writer fails
+            scheduler.close()
+
+        producer.join()
+        if fetch_errors:
+            raise fetch_errors[0]
+
+        print(f"fetched {fetched} submissions")
+        print(f"processed {processed} submissions")
+
+        if args.dry_run:
+            return
+
+        with hold_lease(backend, "state"):
+            get_state_store().flush()
+            for shard in shards:
+                if newest_seen[shard] > last_watermarks[shard]:
+                    save_watermark(newest_seen[shard], shard_watermark_key(shard))
+                    print(f"updated watermark")
+    finally:
+        for shard in shards:
+            backend.release(shard_lease_name(shard), LEASE_OWNER)
+
+
 def main():
     parser = argparse.ArgumentParser()
+    parser.add_argument("command", nargs="?", default="sync",
+                        choices=["sync", "plan", "apply"])
     parser.add_argument("--once", action="store_true")
     parser.add_argument("--dry-run", action="store_true")
     parser.add_argument("--ignore-watermark", action="store_true")
     parser.add_argument("--skip-field-check", action="store_true")
     parser.add_argument("--skip-field-deletion", action="store_true")
+    parser.add_argument("--plan-file", default=PLAN_FILE)
+    parser.add_argument("--snapshot", default=SNAPSHOT_FILE)
+    parser.add_argument("--refresh-snapshot", action="store_true")
+    parser.add_argument("--changelog", default=CHANGELOG_TARGET)
     args = parser.parse_args()
 
     if not (JOTFORM_FORM_ID and AIRTABLE_BASE_ID and AIRTABLE_TABLE):
         die("Missing required config")
 
+    try:
+        timestamps.set_timezone(JOTFORM_TIMEZONE)
+    except ValueError:
+        die(f"Invalid JOTFORM_TIMEZONE: {JOTFORM_TIMEZONE!r}")
+
+    if args.command == "plan":
+        run_plan(args)
+        return
+
+    if not args.dry_run:
+        open_changelog(args.changelog)
+
+    if args.command == "apply":
+        run_apply(args)
+        return
+
     if not args.skip_field_check:
         try:
             auto_create_missing_fields()
@@ -689,29 +1908,7 @@ def main():
         except Exception as e:
             print(f"field deletion error: {e}")
 
-    last_watermark = 0 if args.ignore_watermark else load_watermark()
-    submissions = fetch_all_submissions()
-    print(f"fetched {len(submissions)} submissions")
-
-    processed = 0
-    newest_seen = last_watermark
-
-    for s in submissions:
-        updated_at = parse_timestamp(
-            s.get("updated_at") or s.get("created_at")
-        )
-        if updated_at <= last_watermark:
-            continue
-        upsert_to_airtable(s, dry_run=args.dry_run)
-        processed += 1
-        if updated_at > newest_seen:
-            newest_seen = updated_at
-
-    print(f"processed {processed} submissions")
-
-    if newest_seen > last_watermark and not args.dry_run:
-        save_watermark(newest_seen)
-        print(f"updated watermark")
+    run_sync(args)
 
 
 if __name__ == "__main__":
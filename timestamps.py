@@ -0,0 +1,98 @@
+import calendar
+from datetime import datetime, timezone, tzinfo
+from functools import lru_cache
+from typing import Any, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# JotForm returns "YYYY-MM-DD HH:MM:SS" in the account's timezone.
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+TIMEZONE: tzinfo = timezone.utc
+
+
+def set_timezone(name: str) -> None:
+    """Interpret JotForm timestamps in ``name`` (an IANA zone, or UTC).
+
+    Raises ValueError if ``name`` is not a known zone.
+    """
+    global TIMEZONE
+    if name.upper() in ("", "UTC"):
+        TIMEZONE = timezone.utc
+    else:
+        try:
+            TIMEZONE = ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError, OSError):
+            raise ValueError(f"unknown timezone {name!r}") from None
+    parse_datetime_string.cache_clear()
+
+
+@lru_cache(maxsize=65536)
+def parse_datetime_string(value: str) -> int:
+    """Epoch seconds for "YYYY-MM-DD HH:MM:SS", or 0 if it is not a timestamp."""
+    if (len(value) != 19 or value[4] != "-" or value[7] != "-"
+            or value[10] != " " or value[13] != ":" or value[16] != ":"):
+        # Rare non-padded forms such as "2024-1-5 9:00:00"
+        try:
+            dt = datetime.strptime(value, TIMESTAMP_FORMAT)
+        except ValueError:
+            return 0
+        return int(dt.replace(tzinfo=TIMEZONE).timestamp())
+    try:
+        parts = (
+            int(value[0:4]), int(value[5:7]), int(value[8:10]),
+            int(value[11:13]), int(value[14:16]), int(value[17:19]),
+        )
+    except ValueError:
+        return 0
+    if TIMEZONE is timezone.utc:
+        if not (parts[0] >= 1 and 1 <= parts[1] <= 12
+                and 1 <= parts[2] <= calendar.monthrange(parts[0], parts[1])[1]
+                and parts[3] < 24 and parts[4] < 60 and parts[5] < 60):
+            return 0
+        return calendar.timegm(parts)
+    try:
+        return int(datetime(*parts, tzinfo=TIMEZONE).timestamp())
+    except ValueError:
+        return 0
+
+
+def parse_timestamp(value: Any) -> int:
+    if not value:
+        return 0
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        ts = parse_datetime_string(value)
+        if ts:
+            return ts
+        try:
+            return int(value)
+        except ValueError:
+            return 0
+    return 0
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> Optional[str]:
+    """Normalise the leading date of ``value`` to "YYYY-MM-DD", or None."""
+    tokens = value.split()
+    if not tokens:
+        return None
+    head = tokens[0]
+    if len(head) == 10 and head[4] == "-" and head[7] == "-":
+        try:
+            year, month, day = int(head[0:4]), int(head[5:7]), int(head[8:10])
+        except ValueError:
+            return None
+        if year >= 1 and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]:
+            return head
+        return None
+    # Rare non-padded forms such as "2024-1-5"
+    try:
+        return datetime.strptime(head, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def format_timestamp(ts: int) -> str:
+    """Format epoch seconds the way JotForm expects in API filters."""
+    return datetime.fromtimestamp(ts, TIMEZONE).strftime(TIMESTAMP_FORMAT)